@@ -1,4 +1,5 @@
 import random
+from datetime import date
 
 import pendulum
 
@@ -31,9 +32,10 @@ def generate_benchmark_data(n_patients: int = N_BASE_RESOURCES) -> DatasetGenera
 
     # covid vaccination(s)
 
+    today = date.today().isoformat()
     vaccination_date_generator = FieldGenerator(
         field="occurrenceDateTime",
-        generator_function=lambda: pendulum.now().to_date_string(),
+        generator_function=lambda: today,
     )
 
     # first shot covid vaccine
@@ -217,7 +217,7 @@ class FhirQueryAsync(FhirQueryBase):
                 )
                 if next_page:
                     page_response = await self.client.get(next_page["url"])
-                    response_json = page_response.json()
+                    response_json = orjson.loads(page_response.content)
                     response_entries = response_json["entry"]
                     entries.extend(response_entries)
                     self._execute_callback(response_entries, page_callback)
@@ -215,7 +215,9 @@ class FhirQuerySync(FhirQueryBase):
                     None,
                 )
                 if next_page:
-                    response_json = self.client.get(next_page["url"]).json()
+                    response_json = orjson.loads(
+                        self.client.get(next_page["url"]).content
+                    )
                     response_entries = response_json["entry"]
                     entries.extend(response_entries)
                     self._execute_callback(response_entries, page_callback)
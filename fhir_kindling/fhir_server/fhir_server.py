@@ -4,6 +4,7 @@ from typing import Iterable, List, Union
 
 import fhir.resources
 import httpx
+import orjson
 from authlib.integrations.httpx_client import OAuth2Client
 from authlib.oauth2.rfc6749 import OAuth2Token
 from authlib.oauth2.rfc7523 import ClientSecretJWT
@@ -34,7 +35,7 @@ from fhir_kindling.fhir_server.transactions import (
     make_transaction_bundle,
 )
 from fhir_kindling.fhir_server.transfer import transfer
-from fhir_kindling.serde.json import json_dict
+from fhir_kindling.serde.json import json_bytes
 from fhir_kindling.util.retry_transport import RetryTransport
 
 
@@ -112,6 +113,7 @@ class FhirServer:
         self._headers = headers
         self._proxies = proxies
         self._timeout = timeout
+        self._client: Union[httpx.Client, None] = None
 
     @classmethod
     def from_env(cls, no_auth: bool = False) -> "FhirServer":
@@ -321,10 +323,9 @@ class FhirServer:
         """
         if isinstance(reference, Reference):
             reference = reference.reference
-        with self._sync_client() as client:
-            r = client.get(f"{self.api_address}/{reference}")
+        r = self._sync_client().get(f"{self.api_address}/{reference}")
         r.raise_for_status()
-        resource_dict = r.json()
+        resource_dict = orjson.loads(r.content)
         resource = construct_fhir_element(resource_dict["resourceType"], resource_dict)
         return resource
 
@@ -344,7 +345,7 @@ class FhirServer:
         async with self._async_client() as client:
             r = await client.get(f"{self.api_address}/{reference}")
             r.raise_for_status()
-        resource_dict = r.json()
+        resource_dict = orjson.loads(r.content)
         resource = construct_fhir_element(resource_dict["resourceType"], resource_dict)
         return resource
 
@@ -372,10 +373,11 @@ class FhirServer:
             transaction_type=TransactionType.BATCH,
             references=str_references,
         )
-        with self._sync_client() as client:
-            r = client.post(self.api_address, json=json_dict(get_many_transaction))
-            r.raise_for_status()
-        entries = r.json()["entry"]
+        r = self._sync_client().post(
+            self.api_address, content=json_bytes(get_many_transaction)
+        )
+        r.raise_for_status()
+        entries = orjson.loads(r.content)["entry"]
         resources = [
             construct_fhir_element(entry["resource"]["resourceType"], entry["resource"])
             for entry in entries
@@ -409,13 +411,13 @@ class FhirServer:
 
         async with self._async_client() as client:
             response = await client.post(
-                self.api_address, json=get_many_transaction.dict(exclude_none=True)
+                self.api_address, content=json_bytes(get_many_transaction)
             )
 
         # construct the list of resources from the server response
         resources = [
             construct_fhir_element(entry["resource"]["resourceType"], entry["resource"])
-            for entry in response.json()["entry"]
+            for entry in orjson.loads(response.content)["entry"]
         ]
         return resources
 
@@ -624,10 +626,11 @@ class FhirServer:
         update_bundle = make_transaction_bundle(
             method=TransactionMethod.PUT, resources=resources
         )
-        with self._sync_client() as client:
-            r = client.post(self.api_address, json=json_dict(update_bundle))
-            r.raise_for_status()
-        return r.json()
+        r = self._sync_client().post(
+            self.api_address, content=json_bytes(update_bundle)
+        )
+        r.raise_for_status()
+        return orjson.loads(r.content)
 
     async def update_async(self, resources: List[Union[FHIRResourceModel, dict]]):
         update_bundle = make_transaction_bundle(
@@ -635,9 +638,9 @@ class FhirServer:
         )
 
         async with self._async_client() as client:
-            r = await client.post(self.api_address, json=json_dict(update_bundle))
+            r = await client.post(self.api_address, content=json_bytes(update_bundle))
             r.raise_for_status()
-        return r.json()
+        return orjson.loads(r.content)
 
     def delete(
         self,
@@ -668,9 +671,10 @@ class FhirServer:
             references=references,
         )
 
-        with self._sync_client() as client:
-            r = client.post(self.api_address, json=json_dict(delete_bundle))
-            r.raise_for_status()
+        r = self._sync_client().post(
+            self.api_address, content=json_bytes(delete_bundle)
+        )
+        r.raise_for_status()
 
     async def delete_async(
         self,
@@ -702,7 +706,7 @@ class FhirServer:
         )
 
         async with self._async_client() as client:
-            r = await client.post(self.api_address, json=json_dict(delete_bundle))
+            r = await client.post(self.api_address, content=json_bytes(delete_bundle))
             r.raise_for_status()
 
     def transfer(
@@ -768,6 +772,14 @@ class FhirServer:
         summary = await create_server_summary_async(self, self.rest_resources, display)
         return summary
 
+    def close(self):
+        """
+        Close the synchronous httpx client of the server and release its pooled connections
+        """
+        if self._client:
+            self._client.close()
+            self._client = None
+
     @property
     def capabilities(self) -> CapabilityStatement:
         """
@@ -855,13 +867,12 @@ class FhirServer:
             BundleCreateResponse with the server assigned ids
 
         """
-        with self._sync_client() as client:
-            r = client.post(url=self.api_address, json=json_dict(bundle))
-            try:
-                r.raise_for_status()
-            except Exception as e:
-                print(r.text)
-                raise e
+        r = self._sync_client().post(url=self.api_address, content=json_bytes(bundle))
+        try:
+            r.raise_for_status()
+        except Exception as e:
+            print(r.text)
+            raise e
         bundle_response = BundleCreateResponse(r, bundle)
         return bundle_response
 
@@ -875,7 +886,7 @@ class FhirServer:
             BundleCreateResponse with the server assigned ids
         """
         async with self._async_client() as client:
-            r = await client.post(url=self.api_address, json=json_dict(bundle))
+            r = await client.post(url=self.api_address, content=json_bytes(bundle))
             try:
                 r.raise_for_status()
             except Exception as e:
@@ -894,13 +905,12 @@ class FhirServer:
             httpx.Response from the server
         """
         url = self.api_address + "/" + resource.get_resource_type()
-        with self._sync_client() as client:
-            r = client.post(url=url, json=json_dict(resource))
-            try:
-                r.raise_for_status()
-            except Exception as e:
-                print(r.text)
-                raise e
+        r = self._sync_client().post(url=url, content=json_bytes(resource))
+        try:
+            r.raise_for_status()
+        except Exception as e:
+            print(r.text)
+            raise e
         return r
 
     async def _upload_resource_async(self, resource: Resource) -> httpx.Response:
@@ -914,7 +924,7 @@ class FhirServer:
         """
         url = self.api_address + "/" + resource.get_resource_type()
         async with self._async_client() as client:
-            r = await client.post(url=url, json=json_dict(resource))
+            r = await client.post(url=url, content=json_bytes(resource))
             try:
                 r.raise_for_status()
             except Exception as e:
@@ -924,32 +934,33 @@ class FhirServer:
 
     def _get_meta_data(self):
         url = self.api_address + "/metadata"
-        with self._sync_client() as client:
-            r = client.get(url)
-            try:
-                r.raise_for_status()
-            except Exception as e:
-                print(r.text)
-                raise e
-        response = r.json()
+        r = self._sync_client().get(url)
+        try:
+            r.raise_for_status()
+        except Exception as e:
+            print(r.text)
+            raise e
+        response = orjson.loads(r.content)
         self._meta_data = response
 
     def _sync_client(self) -> httpx.Client:
-        """Get a synchronous httpx client
+        """Get the synchronous httpx client of the server. The client is created on first use and reused for all
+        following requests to keep the connections to the server alive. Headers and auth are applied on every
+        call, so changes to the token, credentials or headers of the server take effect on the next request.
 
         Returns:
             _httpx.Client: synchronous httpx client
         """
-
-        transport = self._setup_transport()
-        client = httpx.Client(
-            headers=self.headers,
-            auth=self.auth,
-            proxies=self._proxies,
-            timeout=self._timeout,
-            transport=transport,
-        )
-        return client
+        if self._client is None or self._client.is_closed:
+            transport = self._setup_transport()
+            self._client = httpx.Client(
+                proxies=self._proxies,
+                timeout=self._timeout,
+                transport=transport,
+            )
+        self._client.headers = self.headers
+        self._client.auth = self.auth
+        return self._client
 
     def _async_client(self) -> httpx.AsyncClient:
         transport = self._setup_transport(async_transport=True)
@@ -1017,6 +1028,12 @@ class FhirServer:
                 "Must specify either a resource, query string or query parameters"
             )
 
+    def __enter__(self) -> "FhirServer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def __repr__(self):
         return f"FhirServer(api_address={self.api_address})"
 
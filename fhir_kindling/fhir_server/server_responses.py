@@ -1,6 +1,7 @@
 import json
 from typing import List
 
+import orjson
 from fhir.resources.bundle import Bundle
 from fhir.resources.reference import Reference
 from fhir.resources.resource import Resource
@@ -53,7 +54,7 @@ class BundleCreateResponse:
 
     def __init__(self, server_response: Response, bundle: Bundle):
         self.create_responses = []
-        for i, entry in enumerate(server_response.json()["entry"]):
+        for i, entry in enumerate(orjson.loads(server_response.content)["entry"]):
             resource = bundle.entry[i].resource
             create_response = ResourceCreateResponse(entry["response"], resource)
             self.create_responses.append(create_response)
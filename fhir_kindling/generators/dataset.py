@@ -1,27 +1,39 @@
+import multiprocessing
 import random
-from typing import Dict, List, Optional, Type, Union
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Type, Union
 from uuid import uuid4
 
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
+import pendulum
 from fhir.resources import (
     FHIRAbstractModel,
     construct_fhir_element,
+    fhirtypes,
     get_fhir_model_class,
 )
+from fhir.resources.bundle import Bundle, BundleEntry, BundleEntryRequest
 from fhir.resources.fhirresourcemodel import FHIRResourceModel
 from fhir.resources.fhirtypes import ReferenceType
 from fhir.resources.reference import Reference
 from pydantic import BaseModel
+from pydantic.fields import ModelField
 from tqdm.autonotebook import tqdm
 
 from fhir_kindling.fhir_server import FhirServer
-from fhir_kindling.fhir_server.transfer import reference_graph, resolve_reference_graph
+from fhir_kindling.fhir_server.server_responses import ResourceCreateResponse
 from fhir_kindling.generators.base import BaseGenerator
 from fhir_kindling.generators.patient import PatientGenerator
 from fhir_kindling.generators.resource_generator import ResourceGenerator
 from fhir_kindling.generators.time_series_generator import TimeSeriesGenerator
+from fhir_kindling.serde.flatten import flatten_dict
+from fhir_kindling.serde.json import json_dict
 from fhir_kindling.util import get_resource_fields
+from fhir_kindling.util.resources import construct_resource
 
 
 class DataSetResourceGenerator(BaseGenerator):
@@ -43,6 +55,7 @@ class DataSetResourceGenerator(BaseGenerator):
             Union[str, List[str], List[Union[str, None]], None]
         ] = None,
         likelihood: float = 1.0,
+        rng: Optional[np.random.Generator] = None,
     ):
         self.name = name
         self.generator = generator
@@ -50,6 +63,7 @@ class DataSetResourceGenerator(BaseGenerator):
         self.reference_field = reference_field
         self.likelihood = likelihood
         self.references = {}
+        self._rng = rng if rng is not None else np.random.default_rng()
 
     def add_reference(self, reference_field: str, reference: Union[Reference, str]):
         if isinstance(reference, str):
@@ -63,36 +77,42 @@ class DataSetResourceGenerator(BaseGenerator):
 
         self.references[reference_field] = reference
 
-    def generate(self):
+    def generate(self, as_dict: bool = False):
         # generate based on the likelihood
         if self.likelihood < 1.0:
-            if random.random() > self.likelihood:
+            if self._rng.random() > self.likelihood:
                 return None
 
         if isinstance(self.generator, TimeSeriesGenerator):
-            return self._generate_time_series()
+            return self._generate_time_series(as_dict=as_dict)
 
         elif isinstance(self.generator, ResourceGenerator) or isinstance(
             self.generator, PatientGenerator
         ):
-            return self._generate_single()
+            return self._generate_single(as_dict=as_dict)
 
         else:
             raise ValueError(
                 f"Expected ResourceGenerator or TimeSeriesGenerator, got {type(self.generator)}"
             )
 
-    def _generate_single(self):
+    def _generate_single(self, as_dict: bool = False):
         base_resource_dict = self.generator.generate(generate_ids=True, as_dict=True)
         if self.references:
             # insert the references
 
             base_resource_dict = {**base_resource_dict, **self.references}
 
+        if as_dict:
+            resource_type = self.generator.resource.get_resource_type()
+            return {
+                "resourceType": resource_type,
+                **{k: _json_value(v) for k, v in base_resource_dict.items()},
+            }
         resource = self.generator.resource(**base_resource_dict)
         return resource
 
-    def _generate_time_series(self):
+    def _generate_time_series(self, as_dict: bool = False):
         resources = self.generator.generate(generate_ids=True, as_dict=True)
         if self.references:
             # insert the references
@@ -103,6 +123,8 @@ class DataSetResourceGenerator(BaseGenerator):
                     r[field] = reference
             # resources = [{**resource, **self.references} for resource in resources]
         if isinstance(self.generator, TimeSeriesGenerator):
+            if as_dict:
+                return resources
             r_type = self.generator.generator.resource
             return [r_type(**resource) for resource in resources]
         else:
@@ -137,10 +159,212 @@ class DataSet(BaseModel):
             return size / 1024 / 1024
         return size
 
-    def upload(self, server: "FhirServer", display: bool = False):
-        ds_graph = reference_graph(self.resources)
-        result, _ = resolve_reference_graph(ds_graph, server, True, display=display)
-        return result
+    def upload(
+        self, server: "FhirServer", display: bool = False, batch_size: int = 1000
+    ) -> List[ResourceCreateResponse]:
+        """
+        Upload the dataset to a server in transaction bundles. References between the resources of the
+        dataset are replaced with placeholder urn:uuid full urls that the server resolves during the transaction.
+        Resources that are connected by references are always uploaded in the same bundle.
+
+        Args:
+            server: the server to upload the dataset to
+            display: whether to display a progress bar over the uploaded bundles
+            batch_size: maximum number of resources in one bundle, a group of connected resources larger than
+                the batch size is uploaded in its own bundle
+
+        Returns:
+            the create responses for the uploaded resources
+        """
+        resource_dicts = [json_dict(resource) for resource in self.resources]
+        batches = self._make_batches(resource_dicts, batch_size)
+
+        create_responses = []
+        p_bar = tqdm(batches, disable=not display)
+        for i, batch in enumerate(p_bar):
+            p_bar.set_description(
+                f"Uploading Batch {i + 1}/{len(batches)}, n={len(batch)}"
+            )
+            bundle = self._make_transaction_bundle(batch, resource_dicts)
+            response = server.add_bundle(bundle, validate=False)
+            create_responses.extend(response.create_responses)
+        return create_responses
+
+    def _make_batches(
+        self, resource_dicts: List[dict], batch_size: int
+    ) -> List[List[int]]:
+        """Split the indices of the resources into batches, keeping the resources connected by references together"""
+        paths = {
+            resource.relative_path(): i
+            for i, resource in enumerate(self.resources)
+            if resource.id
+        }
+        graph = nx.Graph()
+        graph.add_nodes_from(range(len(self.resources)))
+        for i, resource_dict in enumerate(resource_dicts):
+            for reference in _find_references(resource_dict):
+                if reference in paths:
+                    graph.add_edge(i, paths[reference])
+
+        groups = sorted(sorted(group) for group in nx.connected_components(graph))
+        batches = []
+        batch = []
+        for group in groups:
+            if batch and len(batch) + len(group) > batch_size:
+                batches.append(batch)
+                batch = []
+            batch.extend(group)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _make_transaction_bundle(
+        self, batch: List[int], resource_dicts: List[dict]
+    ) -> Bundle:
+        placeholders = {
+            self.resources[i].relative_path(): f"urn:uuid:{self.resources[i].id}"
+            for i in batch
+            if self.resources[i].id
+        }
+        entries = []
+        for i in batch:
+            resource = self.resources[i]
+            resource_dict = _replace_references(resource_dicts[i], placeholders)
+            # the server assigns the ids of created resources
+            resource_dict.pop("id", None)
+            resource_type = resource.get_resource_type()
+            entry = BundleEntry.construct(
+                resource=construct_resource(type(resource), resource_dict),
+                request=BundleEntryRequest.construct(method="POST", url=resource_type),
+            )
+            if resource.id:
+                entry.fullUrl = placeholders[resource.relative_path()]
+            entries.append(entry)
+
+        return Bundle.construct(type="transaction", entry=entries)
+
+
+_shard_generator: Optional["DatasetGenerator"] = None
+
+
+def _init_shard(generator: "DatasetGenerator"):
+    global _shard_generator
+    _shard_generator = generator
+    # forked workers would otherwise share the random state of the parent
+    random.seed()
+
+
+def _generate_shard(seeds: List[int]) -> list:
+    return _shard_generator._generate_resources(seeds)
+
+
+def _seed_generator(generator: BaseGenerator, rng: np.random.Generator):
+    """Seed a sub generator of a dataset and its field generators with seeds drawn from the dataset"""
+    if isinstance(generator, TimeSeriesGenerator):
+        generator = generator.generator
+
+    generator.seed = int(rng.integers(2**32))
+    generator._rng = np.random.default_rng(generator.seed)
+    if isinstance(generator, PatientGenerator):
+        generator._faker.seed_instance(generator.seed)
+    elif generator.params and generator.params.field_generators:
+        for field_generator in generator.params.field_generators:
+            field_generator._rng = np.random.default_rng(rng.integers(2**32))
+
+
+def _json_value(value: Any) -> Any:
+    """Convert fhir element values in generated data into their json representation"""
+    if isinstance(value, FHIRAbstractModel):
+        return json_dict(value)
+    elif isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+def _typed_row(resource: Type[FHIRAbstractModel], data: dict) -> dict:
+    """Order a resource dict like the serialized model and parse its date values, before flattening it"""
+    row = {}
+    if "resourceType" in data:
+        row["resourceType"] = data["resourceType"]
+    alias_mapping = resource.get_alias_mapping()
+    for alias in resource.elements_sequence():
+        field = resource.__fields__[alias_mapping[alias]]
+        key = alias if alias in data else field.name
+        if key in data:
+            value = data[key]
+            if isinstance(value, list):
+                value = [_typed_value(field, item) for item in value]
+            else:
+                value = _typed_value(field, value)
+            row[alias] = value
+        # primitive extensions follow their value
+        if f"_{alias}" in data:
+            row[f"_{alias}"] = data[f"_{alias}"]
+    # keep values that are not fields of the model at the end
+    for key, value in data.items():
+        row.setdefault(key, value)
+    return row
+
+
+def _typed_value(field: ModelField, value: Any) -> Any:
+    element_type = getattr(field.type_, "__resource_type__", None)
+    if element_type and isinstance(value, dict):
+        # contained resources define their own type
+        element_type = value.get("resourceType", element_type)
+        return _typed_row(get_fhir_model_class(element_type), value)
+    if isinstance(value, str):
+        if field.type_ is fhirtypes.Date:
+            return np.datetime64(pendulum.parse(value).date(), "D")
+        if field.type_ in (fhirtypes.DateTime, fhirtypes.Instant):
+            utc_time = pendulum.parse(value).in_timezone("UTC").naive()
+            return np.datetime64(utc_time, "us")
+    return value
+
+
+def _columns_from_rows(rows: List[dict]) -> Dict[str, np.ndarray]:
+    # the columns are the union of the keys of all rows, in order of appearance
+    keys = dict.fromkeys(key for row in rows for key in row)
+    return {key: _column_array([row.get(key) for row in rows]) for key in keys}
+
+
+def _column_array(values: list) -> np.ndarray:
+    """Infer a typed array for date, numeric and boolean columns, all other columns are object arrays"""
+    types = {type(value) for value in values if value is not None}
+    missing = None in values
+    if types and all(issubclass(t, np.datetime64) for t in types):
+        return np.array(values, dtype="datetime64")
+    if types and types <= {int, float}:
+        if missing or float in types:
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        return np.array(values, dtype=np.int64)
+    if types == {bool} and not missing:
+        return np.array(values, dtype=bool)
+    return np.array(values, dtype=object)
+
+
+def _find_references(value: Any) -> Iterator[str]:
+    """Recursively find the references in a resource dict"""
+    if isinstance(value, dict):
+        reference = value.get("reference")
+        if isinstance(reference, str):
+            yield reference
+        for item in value.values():
+            yield from _find_references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _find_references(item)
+
+
+def _replace_references(value: Any, placeholders: Dict[str, str]) -> Any:
+    """Recursively replace the references in a resource dict that point to a placeholder"""
+    if isinstance(value, dict):
+        reference = value.get("reference")
+        if isinstance(reference, str) and reference in placeholders:
+            return {**value, "reference": placeholders[reference]}
+        return {k: _replace_references(v, placeholders) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_replace_references(item, placeholders) for item in value]
+    return value
 
 
 class DatasetGenerator:
@@ -149,7 +373,13 @@ class DatasetGenerator:
     Generates a dataset of FHIR resources.
     """
 
-    def __init__(self, base_resource: str = "Patient", n: int = None, name: str = None):
+    def __init__(
+        self,
+        base_resource: str = "Patient",
+        n: int = None,
+        name: str = None,
+        seed: Optional[int] = None,
+    ):
         self.name = name if name else str(uuid4())
 
         if base_resource == "Patient":
@@ -168,6 +398,9 @@ class DatasetGenerator:
         self._nodes = set()
         self._graph = nx.DiGraph()
         self._resource_types = set()
+        # all random draws of the dataset are derived from this generator
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
 
         self.setup()
 
@@ -181,35 +414,90 @@ class DatasetGenerator:
             likelihood=1.0,
         )
 
-    def generate(self, display: bool = False) -> DataSet:
+    def generate(self, display: bool = False, n_jobs: int = 1) -> DataSet:
         """
         Generate a dataset of FHIR resources according to the given conditions
 
         Args:
-            ids:
+            display: whether to display a progress bar
+            n_jobs: number of processes to split the generation across, -1 uses all available cores.
+                Only supported on linux, other platforms generate in the current process.
 
-        Returns:
+        Each row of the dataset is generated from its own seed, drawn from the dataset's random generator.
+        A seeded dataset generator therefore returns the same dataset for its first call to generate, regardless
+        of n_jobs, and following calls continue the random stream and return new datasets.
+        Field values given as lists and draws from the random module in custom generator functions are not
+        covered by the seed.
 
+        Returns:
+            the generated dataset
         """
-        resources = []
-        for _ in tqdm(range(self.n), disable=not display, desc="Generating dataset"):
-            batch = self._generate_resources_from_graph()
-            added_resources = []
-
-            for k, v in batch.items():
-                if v is None:
-                    continue
-
-                if isinstance(v, list):
-                    added_resources.extend(v)
-                else:
-                    added_resources.append(v)
-            resources.extend(added_resources)
+        if n_jobs == -1:
+            n_jobs = multiprocessing.cpu_count()
+        n_jobs = min(n_jobs, self.n)
+        self._prepare_generation()
+        seeds = self._row_seeds()
+
+        # forking is only safe on linux, macOS no longer uses it by default
+        if n_jobs > 1 and sys.platform.startswith("linux"):
+            resources = self._generate_parallel(seeds, n_jobs, display=display)
+        else:
+            resources = self._generate_resources(seeds, display=display)
 
         dataset = self._make_data_set(resources)
         self._dataset = dataset
         return dataset
 
+    def generate_columnar(
+        self, display: bool = False
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Generate the dataset in a columnar layout.
+        The generated resources are flattened in the same way as `flatten_resources` and stored as one array per
+        column, the columns of a resource type can be directly loaded with `pd.DataFrame(columns)`.
+        Date fields are stored as datetime64[D] and dateTime/instant fields as datetime64[us] in UTC, numeric
+        columns as integer or float arrays and boolean columns without missing values as bool arrays, all other
+        columns are object arrays.
+
+        Patients and time series are still validated as resource models before being converted to dicts.
+        Resources from a `ResourceGenerator` are kept as the generated dicts and are not validated,
+        unlike in `generate`.
+
+        Args:
+            display: whether to display a progress bar
+
+        Returns:
+            dictionary mapping the generated resource types to their columns
+        """
+        self._prepare_generation()
+        rows = {}
+        for seed in tqdm(
+            self._row_seeds(), disable=not display, desc="Generating dataset"
+        ):
+            batch = self._generate_row(seed, as_dict=True)
+            for resource in self._batch_resources(batch):
+                resource_type = resource["resourceType"]
+                row = _typed_row(get_fhir_model_class(resource_type), resource)
+                rows.setdefault(resource_type, []).append(flatten_dict(row))
+
+        return {
+            resource_type: _columns_from_rows(resource_rows)
+            for resource_type, resource_rows in rows.items()
+        }
+
+    @staticmethod
+    def _batch_resources(batch: dict) -> list:
+        resources = []
+        for v in batch.values():
+            if v is None:
+                continue
+
+            if isinstance(v, list):
+                resources.extend(v)
+            else:
+                resources.append(v)
+        return resources
+
     def _make_data_set(self, resources: List[dict]) -> DataSet:
         # construct fhir elements
         fhir_resources = []
@@ -227,7 +515,51 @@ class DatasetGenerator:
 
         return dataset
 
-    def _generate_resources_from_graph(self):
+    def _generate_resources(self, seeds: List[int], display: bool = False) -> list:
+        resources = []
+        for seed in tqdm(seeds, disable=not display, desc="Generating dataset"):
+            batch = self._generate_row(seed)
+            resources.extend(self._batch_resources(batch))
+        return resources
+
+    def _generate_parallel(
+        self, seeds: List[int], n_jobs: int, display: bool = False
+    ) -> list:
+        # split the rows into one shard per process
+        shards = [shard.tolist() for shard in np.array_split(seeds, n_jobs)]
+
+        # forked workers inherit the generator graph, including generator functions that can't be pickled
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_shard,
+            initargs=(self,),
+        ) as pool:
+            results = pool.map(_generate_shard, shards)
+            resources = []
+            for shard in tqdm(
+                results, total=n_jobs, disable=not display, desc="Generating dataset"
+            ):
+                resources.extend(shard)
+        return resources
+
+    def _prepare_generation(self):
+        # capture the reference date for the patient ages once per generation
+        base_generator = self._get_node_generator("base").generator
+        base_generator.reference_date = date.today()
+
+    def _row_seeds(self) -> List[int]:
+        return self._rng.integers(2**63, size=self.n).tolist()
+
+    def _generate_row(self, seed: int, as_dict: bool = False) -> dict:
+        """Generate the resources of one row of the dataset, reseeding all generators with the seed of the row"""
+        rng = np.random.default_rng(seed)
+        for dataset_generator in self.generators:
+            dataset_generator._rng = rng
+            _seed_generator(dataset_generator.generator, rng)
+        return self._generate_resources_from_graph(as_dict=as_dict)
+
+    def _generate_resources_from_graph(self, as_dict: bool = False):
         """
         Generate a set of resource based on the generator graph
         """
@@ -247,7 +579,7 @@ class DatasetGenerator:
             # get the dependencies and add them to the generator
             self._get_refs_for_generator(generator, results)
 
-            result = generator.generate()
+            result = generator.generate(as_dict=as_dict)
             results[node] = result
             # print("Generated", node, result[node])
         return results
@@ -420,6 +752,7 @@ class DatasetGenerator:
             depends_on=depends_on,
             reference_field=reference_field,
             likelihood=likelihood,
+            rng=self._rng,
         )
 
         # add the generator to the graph
@@ -1,7 +1,9 @@
-import random
+from bisect import bisect
+from itertools import accumulate
 from typing import Any, Callable, List, Optional
 
-from pydantic import BaseModel, root_validator, validator
+import numpy as np
+from pydantic import BaseModel, PrivateAttr, root_validator, validator
 
 
 class FieldGenerator(BaseModel):
@@ -9,6 +11,17 @@ class FieldGenerator(BaseModel):
     choices: Optional[List[Any]] = None
     choice_probabilities: Optional[List[float]] = None
     generator_function: Callable[[], Any] = None
+    seed: Optional[int] = None
+
+    _rng: np.random.Generator = PrivateAttr()
+    _cum_probabilities: Optional[List[float]] = PrivateAttr(None)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._rng = np.random.default_rng(self.seed)
+        # precompute the cumulative distribution to sample with a single draw
+        if self.choice_probabilities:
+            self._cum_probabilities = list(accumulate(self.choice_probabilities))
 
     @validator("choice_probabilities", always=True)
     def check_probability_sum(cls, v):
@@ -34,11 +47,25 @@ class FieldGenerator(BaseModel):
 
     def generate(self):
         if self.choices:
-            if self.choice_probabilities:
-                return random.choices(
-                    self.choices, weights=self.choice_probabilities, k=1
-                )[0]
+            if self._cum_probabilities:
+                index = bisect(self._cum_probabilities, self._rng.random())
             else:
-                return random.choice(self.choices)
+                index = self._rng.integers(len(self.choices))
+            return self.choices[index]
         else:
             return self.generator_function()
+
+    def generate_many(self, n: int) -> List[Any]:
+        """
+        Generate n values for the field, drawing the indices of the choices in a single batch
+        """
+        if not self.choices:
+            return [self.generator_function() for _ in range(n)]
+
+        if self.choice_probabilities:
+            indices = self._rng.choice(
+                len(self.choices), size=n, p=self.choice_probabilities
+            )
+        else:
+            indices = self._rng.integers(len(self.choices), size=n)
+        return [self.choices[index] for index in indices]
@@ -1,8 +1,8 @@
-import random
-from typing import List, Tuple
-from uuid import uuid4
+from datetime import date
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 
-import pandas as pd
+import numpy as np
 import pendulum
 from faker import Faker
 from fhir.resources.humanname import HumanName
@@ -21,6 +21,8 @@ class PatientGenerator(BaseGenerator):
         gender_distribution: Tuple[float, float, float, float] = None,
         organisation: Reference = None,
         generate_ids: bool = False,
+        seed: Optional[int] = None,
+        reference_date: Optional[date] = None,
     ):
         self.resource = Patient
         self.n = n
@@ -30,6 +32,12 @@ class PatientGenerator(BaseGenerator):
         self.organisation = organisation
         self.generate_ids = generate_ids
         self.resources = None
+        self.reference_date = reference_date
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._faker = Faker()
+        if seed is not None:
+            self._faker.seed_instance(seed)
 
     def generate(
         self,
@@ -60,61 +68,60 @@ class PatientGenerator(BaseGenerator):
     def _generate(self):
         patients = []
         names = self._generate_patient_names(self.n)
-        for name in names:
-            patient = self._generate_patient_data(name=name)
+        genders = self._generate_genders(self.n)
+        birthdates = self._generate_birthdates(self.n)
+        for name, gender, birthdate in zip(names, genders, birthdates):
+            patient = self._generate_patient_data(
+                name=name, gender=gender, birthdate=birthdate
+            )
             patients.append(patient)
         return patients
 
-    def _generate_patient_data(self, name: Tuple[str, str]) -> Patient:
+    def _generate_patient_data(
+        self, name: Tuple[str, str], gender: str, birthdate: str
+    ) -> Patient:
         first_name, last_name = name
-        gender = random.choices(
-            ["male", "female", "other", "unknown"],
-            weights=self.gender_distribution
-            if self.gender_distribution
-            else [0.45, 0.45, 0.1, 0.0],
-            k=1,
-        )[0]
 
         name = HumanName(**{"family": last_name, "given": [first_name]})
 
-        birthdate = self._generate_birthdate()
         patient_dict = {"gender": gender, "name": [name], "birthDate": birthdate}
         if self.organisation:
             patient_dict["managingOrganization"] = self.organisation
 
-        patient_id = str(uuid4())
-        patient_dict["id"] = patient_id
+        patient_dict["id"] = self._generate_id()
 
         return Patient(**patient_dict)
 
-    @staticmethod
-    def _generate_patient_names(n: int):
-        fake = Faker()
+    def _generate_genders(self, n: int) -> List[str]:
+        distribution = self.gender_distribution or [0.45, 0.45, 0.1, 0.0]
+        weights = np.asarray(distribution, dtype=float)
+        genders = self._rng.choice(
+            ["male", "female", "other", "unknown"], size=n, p=weights / weights.sum()
+        )
+        return genders.tolist()
+
+    def _generate_id(self) -> str:
+        # derive the ids from the seeded generator to make them reproducible
+        if self.seed is not None:
+            return str(UUID(bytes=self._rng.bytes(16), version=4))
+        return str(uuid4())
 
+    def _generate_patient_names(self, n: int):
         names = []
         for _ in range(n):
-            split = fake.name().split(" ")
+            split = self._faker.name().split(" ")
             family = split[-1]
             given = " ".join(split[:-1])
             names.append((given, family))
         return names
 
-    def _generate_birthdate(self):
-        if not self._birthdate_range:
+    def _generate_birthdates(self, n: int) -> List[str]:
+        # ages are relative to the reference date, defaulting to today
+        reference_date = self.reference_date or date.today()
+        if not self._birthdate_range or self._birthdate_range[0] != reference_date:
             if self.age_range:
                 if isinstance(self.age_range[0], int):
-                    # generate age range from 18-101 years old
-                    now = pendulum.now()
-                    youngest = pd.to_datetime(
-                        (
-                            now - pendulum.duration(years=self.age_range[0])
-                        ).to_date_string()
-                    )
-                    oldest = pd.to_datetime(
-                        (
-                            now - pendulum.duration(years=self.age_range[1])
-                        ).to_date_string()
-                    )
+                    youngest_age, oldest_age = self.age_range
                 else:
                     raise ValueError(
                         f"Unsupported type ({type(self.age_range[0])}) for generating patient ages."
@@ -122,20 +129,24 @@ class PatientGenerator(BaseGenerator):
                     )
             else:
                 # generate age range from 18-101 years old
-                now = pendulum.now()
-                youngest = pd.to_datetime(
-                    (now - pendulum.duration(years=18)).to_date_string()
-                )
-                oldest = pd.to_datetime(
-                    (now - pendulum.duration(years=101)).to_date_string()
-                )
-
-            self._birthdate_range = (
-                pd.date_range(oldest, youngest, freq="D").strftime("%Y-%m-%d").tolist()
+                youngest_age, oldest_age = 18, 101
+
+            now = pendulum.date(
+                reference_date.year, reference_date.month, reference_date.day
+            )
+            youngest = np.datetime64(
+                (now - pendulum.duration(years=youngest_age)).to_date_string()
+            )
+            oldest = np.datetime64(
+                (now - pendulum.duration(years=oldest_age)).to_date_string()
             )
+            self._birthdate_range = (reference_date, oldest, youngest)
 
-        birthdate = random.choice(self._birthdate_range)
-        return birthdate
+        # draw the day offsets for all patients at once
+        _, oldest, youngest = self._birthdate_range
+        offsets = self._rng.integers(0, (youngest - oldest).astype(int) + 1, size=n)
+        birthdates = (oldest + offsets).astype(str)
+        return birthdates.tolist()
 
     def _generate_references(self) -> List[Reference]:
         return [
@@ -145,5 +156,5 @@ class PatientGenerator(BaseGenerator):
     def __repr__(self):
         return (
             f"<PatientGenerator(n={self.n}, age_range={self.age_range}, "
-            f"gender_distribution={self.gender_distribution}>"
+            f"gender_distribution={self.gender_distribution}, seed={self.seed}>"
         )
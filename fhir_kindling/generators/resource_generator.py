@@ -1,6 +1,8 @@
-from typing import Any, List, Optional, Union
-from uuid import uuid4
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
 
+import numpy as np
 from fhir.resources import get_fhir_model_class
 from fhir.resources.fhirresourcemodel import FHIRResourceModel
 from fhir.resources.resource import Resource
@@ -8,6 +10,7 @@ from pydantic import BaseModel
 
 from fhir_kindling.generators.base import BaseGenerator
 from fhir_kindling.generators.field_generator import FieldGenerator
+from fhir_kindling.util.resources import construct_resource
 
 
 class FieldValue(BaseModel):
@@ -32,6 +35,7 @@ class ResourceGenerator(BaseGenerator):
         field_values: dict = None,
         disable_validation: bool = False,
         generator_parameters: GeneratorParameters = None,
+        seed: Optional[int] = None,
     ):
         if not isinstance(resource, str):
             try:
@@ -53,6 +57,8 @@ class ResourceGenerator(BaseGenerator):
         # list to store the field names of all fields being generated
         self._generated_fields = set()
         self._validated = False
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
 
     def required_fields(self) -> List[str]:
         required_fields = []
@@ -83,58 +89,69 @@ class ResourceGenerator(BaseGenerator):
         return resources
 
     def _generate_resources(self, generate_ids: bool, as_dict: bool = False):
+        plan = self._make_plan()
         if self.params.count:
             resources = []
             for _ in range(self.params.count):
-                resource = self._generate_resource(generate_ids, as_dict=as_dict)
+                resource = self._generate_resource(plan, generate_ids, as_dict=as_dict)
                 resources.append(resource)
             return resources
         else:
-            return self._generate_resource(generate_ids, as_dict=as_dict)
+            return self._generate_resource(plan, generate_ids, as_dict=as_dict)
 
-    def _generate_resource(
-        self, generate_id: bool, as_dict: bool = False
-    ) -> Union[FHIRResourceModel, dict]:
-        # construct a resource object to hold the generated fields
-        resource = self.resource.construct()
-        resource_data = {}
-        # disable assignment validation
-        resource.Config.validate_assignment = False
+    def _make_plan(self) -> List[Tuple[str, Callable[[], Any]]]:
+        """
+        Resolve the field values and field generators into (field, getter) pairs once, so that each generated
+        resource is a single pass over the getters
+
+        Returns:
+            list of field names and the functions returning their next value
+        """
+        plan = []
         if self.params.field_values:
             for field_value in self.params.field_values:
-                # update resource with field value
-                self._update_with_field_value(resource_data, field_value)
+                plan.append((field_value.field, self._field_value_getter(field_value)))
 
         if self.params.field_generators:
             for generator in self.params.field_generators:
-                # update resource with generated field value
-                self._update_with_field_generator(resource_data, generator)
+                plan.append((generator.field, generator.generate))
+        return plan
+
+    def _generate_resource(
+        self,
+        plan: List[Tuple[str, Callable[[], Any]]],
+        generate_id: bool,
+        as_dict: bool = False,
+    ) -> Union[FHIRResourceModel, dict]:
+        resource_data = {field: getter() for field, getter in plan}
         if generate_id:
-            resource_data["id"] = str(uuid4())
+            resource_data["id"] = self._generate_id()
 
-        # validate resource when validation is enabled
-        # if not self.disable_validation:
-        #     resource = self.resource(**resource.dict(exclude_none=True))
         if as_dict:
             return resource_data
+        # generated values are trusted when validation is disabled, skip the validators
+        if self.disable_validation:
+            return construct_resource(self.resource, resource_data)
         resource = self.resource(**resource_data)
         return resource
 
-    def _update_with_field_value(self, resource_data: dict, field_value: FieldValue):
+    def _generate_id(self) -> str:
+        # derive the ids from the seeded generator to make them reproducible
+        if self.seed is not None:
+            return str(UUID(bytes=self._rng.bytes(16), version=4))
+        return str(uuid4())
+
+    def _field_value_getter(self, field_value: FieldValue) -> Callable[[], Any]:
+        # list values are consumed one item per resource, across calls to generate
         if isinstance(field_value.value, list) and not field_value.list_field:
             iterator = self._value_iterators.get(field_value.field)
             if not iterator:
                 iterator = iter(field_value.value)
                 self._value_iterators[field_value.field] = iterator
-            resource_data[field_value.field] = next(iterator)
-        else:
-            resource_data[field_value.field] = field_value.value
+            return partial(next, iterator)
 
-    def _update_with_field_generator(
-        self, resource_data: dict, field_generator: FieldGenerator
-    ):
-        value = field_generator.generate()
-        resource_data[field_generator.field] = value
+        value = field_value.value
+        return lambda: value
 
     def _check_required_fields(self):
         """
@@ -1,10 +1,16 @@
+from copy import deepcopy
 from datetime import datetime
 from enum import Enum
-from typing import List, Union
+from itertools import count
+from typing import Dict, List, Tuple, Union
 
 import pendulum
 from fhir.resources.resource import Resource
 from pendulum.datetime import DateTime
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import ModelField
+from pydantic.utils import ROOT_KEY
 
 from fhir_kindling.generators.base import BaseGenerator
 from fhir_kindling.generators.resource_generator import ResourceGenerator
@@ -30,6 +36,15 @@ class TimeUnits(str, Enum):
     YEARS = "y"
 
 
+_FREQUENCY_UNITS = {
+    Frequencies.HOURLY: "hours",
+    Frequencies.DAILY: "days",
+    Frequencies.WEEKLY: "weeks",
+    Frequencies.MONTHLY: "months",
+    Frequencies.YEARLY: "years",
+}
+
+
 class TimeSeriesGenerator(BaseGenerator):
     resource_generator: ResourceGenerator
     time_field: str
@@ -54,8 +69,9 @@ class TimeSeriesGenerator(BaseGenerator):
         self.generator = resource_generator
         self.time_field = time_field
         self.n = n
-        self._prev_time: Union[DateTime, None] = None
         self.generate_ids = True
+        self._template: Union[Tuple[Resource, dict], None] = None
+        self._fields: Dict[str, ModelField] = {}
 
         self._validate_args(freq, period, period_unit, start, end, n)
 
@@ -63,70 +79,120 @@ class TimeSeriesGenerator(BaseGenerator):
         self, generate_ids: bool = True, as_dict: bool = False
     ) -> Union[List[Resource], List[dict]]:
         self.generate_ids = generate_ids
-        if self.n is None:
-            return self._generate_by_end(as_dict=as_dict)
-        else:
-            return self._generate_by_n(as_dict=as_dict)
-
-    def _generate_by_end(self, as_dict: bool) -> List[Resource]:
-        resources = []
-        current_time = self._get_next_time()
-        while current_time < self.end:
-            model = self._generate_resource(current_time, as_dict=as_dict)
-            current_time = self._get_next_time()
-            resources.append(model)
-
-        return resources
-
-    def _generate_by_n(self, as_dict: bool) -> List[Resource]:
-        resources = []
-        for _ in range(self.n):
-            next_time = self._get_next_time()
-            model = self._generate_resource(next_time, as_dict=as_dict)
-            resources.append(model)
-        return resources
+        self._template = None
+        # generated fields can be given by their alias or their python name
+        self._fields = {}
+        for field in self.generator.resource.__fields__.values():
+            self._fields[field.name] = field
+            self._fields[field.alias] = field
+        return [
+            self._generate_resource(time, as_dict=as_dict)
+            for time in self._time_steps()
+        ]
 
     def _generate_resource(
         self, time: DateTime, as_dict: bool
     ) -> Union[Resource, dict]:
-        resource = json_dict(self.generator.generate(generate_ids=self.generate_ids))
-        resource[self.time_field] = time.isoformat()
+        resource_data = self.generator.generate(
+            generate_ids=self.generate_ids, as_dict=True
+        )
+        resource_data[self.time_field] = time.isoformat()
+
+        # fully validate the first resource of the series and use it as template for the following ones
+        if self._template is None:
+            model = self.generator.resource(**resource_data)
+            self._template = (model, resource_data)
+        else:
+            model = self._update_template(resource_data)
 
         if as_dict:
-            return resource
-
-        model = self.generator.resource(**resource)
+            return json_dict(model)
         return model
 
-    def _get_next_time(self) -> datetime:
-        """Get the next time in the series based on the frequency. Updates the internal state of the generator.
+    def _update_template(self, resource_data: dict) -> Resource:
+        """Copy the template resource, only validating the fields whose values differ from the template.
+        The root validators of the resource, checking required primitives and choice elements, run on the
+        whole resource.
+
+        Args:
+            resource_data: the generated data for the next resource in the series
 
         Raises:
-            ValueError: If the frequency is not valid
+            ValidationError: If one of the changed values is not valid for its field or the resource
 
         Returns:
-            _description
+            a copy of the template resource updated with the changed values
         """
-        if not self._prev_time:
-            self._prev_time = self.start
-            return self.start
-
-        next_time = None
-        if self.freq == Frequencies.HOURLY:
-            next_time = self._prev_time.add(hours=1)
-        elif self.freq == Frequencies.DAILY:
-            next_time = self._prev_time.add(days=1)
-        elif self.freq == Frequencies.WEEKLY:
-            next_time = self._prev_time.add(weeks=1)
-        elif self.freq == Frequencies.MONTHLY:
-            next_time = self._prev_time.add(months=1)
-        elif self.freq == Frequencies.YEARLY:
-            next_time = self._prev_time.add(years=1)
+        template, template_data = self._template
+        resource = self.generator.resource
+        resource_data = self._run_root_validators(resource_data)
+
+        update = {}
+        for key, value in resource_data.items():
+            # values that are passed through unchanged have already been validated for the template
+            if template_data.get(key) is value:
+                continue
+            field = self._fields[key]
+            value, errors = field.validate(value, {}, loc=key, cls=resource)
+            if errors:
+                raise ValidationError([errors], resource)
+            update[field.name] = value
+
+        if resource.__post_root_validators__:
+            values = self._run_root_validators(
+                {**template.__dict__, **update}, post=True
+            )
+            update = {
+                name: value
+                for name, value in values.items()
+                if name in update or value is not template.__dict__.get(name)
+            }
+
+        # copy the nested elements taken over from the template, so that the resources of the series don't share them
+        for name, value in template.__dict__.items():
+            if name not in update and isinstance(value, (BaseModel, list, dict)):
+                update[name] = deepcopy(value)
+        return template.copy(update=update)
+
+    def _run_root_validators(self, values: dict, post: bool = False) -> dict:
+        resource = self.generator.resource
+        if post:
+            validators = [
+                validator for _, validator in resource.__post_root_validators__
+            ]
         else:
+            validators = resource.__pre_root_validators__
+        try:
+            for validator in validators:
+                values = validator(resource, values)
+        except (ValueError, TypeError, AssertionError) as exc:
+            raise ValidationError([ErrorWrapper(exc, loc=ROOT_KEY)], resource)
+        return values
+
+    def _time_steps(self) -> List[DateTime]:
+        """Compute all times of the series up front. Every step is offset from the start time, so the
+        series does not depend on state left over from a previous call to generate.
+
+        Raises:
+            ValueError: If the frequency is not valid
+
+        Returns:
+            list of the times in the series
+        """
+        unit = _FREQUENCY_UNITS.get(self.freq)
+        if unit is None:
             raise ValueError(f"Invalid frequency: {self.freq}")
-        #
-        self._prev_time = next_time
-        return next_time
+
+        if self.n is not None:
+            return [self.start.add(**{unit: i}) for i in range(self.n)]
+
+        times = []
+        for i in count():
+            time = self.start.add(**{unit: i})
+            if time >= self.end:
+                break
+            times.append(time)
+        return times
 
     def _validate_args(self, freq, period, period_unit, start, end, n):
         if end is None and n is None:
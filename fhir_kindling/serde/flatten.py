@@ -72,9 +72,7 @@ def flatten_resources(
 
     """
 
-    flat_resources = []
-    for resource in resources:
-        flat_resources.append(flatten_resource(resource))
+    flat_resources = [flatten_resource(resource) for resource in resources]
     return pd.DataFrame.from_records(flat_resources)
 
 
@@ -108,17 +106,22 @@ def flatten_dict(
     Returns:
 
     """
-    items = []
+    flat_dict = {}
+    _flatten_into(flat_dict, d, parent_key, sep)
+    return flat_dict
+
+
+def _flatten_into(flat_dict: dict, d, parent_key: str, sep: str):
+    # write into a single output dict instead of merging intermediate dicts
     for k, v in d.items():
         new_key = parent_key + sep + k if parent_key else k
         if isinstance(v, MutableMapping):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
+            _flatten_into(flat_dict, v, new_key, sep)
         elif isinstance(v, list):
             for i, item in enumerate(v):
                 if isinstance(item, MutableMapping):
-                    items.extend(flatten_dict(item, f"{new_key}_{i}", sep=sep).items())
+                    _flatten_into(flat_dict, item, f"{new_key}_{i}", sep)
                 else:
-                    items.append((f"{new_key}_{i}", item))
+                    flat_dict[f"{new_key}_{i}"] = item
         else:
-            items.append((new_key, v))
-    return dict(items)
+            flat_dict[new_key] = v
@@ -13,3 +13,15 @@ def json_dict(
         return d
     elif json_dict:
         return orjson.loads(orjson.dumps(json_dict))
+
+
+def json_bytes(resource: Union[Resource, FHIRAbstractModel]) -> bytes:
+    """
+    Serialize a resource into json bytes that can be directly used as a request body.
+    Args:
+        resource: the resource to serialize
+
+    Returns: orjson encoded bytes of the resource without None values
+
+    """
+    return resource.json(exclude_none=True, return_bytes=True)
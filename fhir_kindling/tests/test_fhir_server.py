@@ -13,6 +13,7 @@ from httpx import BasicAuth, HTTPStatusError
 
 from fhir_kindling import FhirQuerySync, FhirServer
 from fhir_kindling.fhir_query import FhirQueryParameters
+from fhir_kindling.fhir_server.auth import BearerAuth
 from fhir_kindling.generators import PatientGenerator
 from fhir_kindling.serde.json import json_dict
 
@@ -478,6 +479,24 @@ def test_custom_auth():
     #     server = FhirServer(api_address="https://fhir.test/fhir", auth=auth, client_id="test")
 
 
+def test_client_reuse():
+    with FhirServer(api_address="https://fhir.test/fhir") as server:
+        client = server._sync_client()
+        assert server._sync_client() is client
+        assert server.query("Patient").client is client
+
+        # changes to the auth and headers of the server apply to the cached client
+        server.token = "token"
+        server._headers = {"X-Test": "test"}
+        client = server._sync_client()
+        assert isinstance(client.auth, BearerAuth)
+        assert client.headers["X-Test"] == "test"
+
+    assert client.is_closed
+    assert server._sync_client() is not client
+    server.close()
+
+
 def test_query_with_params(fhir_server: FhirServer):
     params = FhirQueryParameters(resource="Condition")
     query = fhir_server.query(query_parameters=params)
@@ -1,13 +1,16 @@
 import os
 import random
-from datetime import datetime
+from datetime import date, datetime
 
-import pendulum
+import numpy as np
+import pandas as pd
 import pytest
 from dotenv import find_dotenv, load_dotenv
 from fhir.resources.codeableconcept import CodeableConcept
 from fhir.resources.coding import Coding
+from fhir.resources.condition import Condition
 from fhir.resources.patient import Patient
+from fhir.resources.quantity import Quantity
 from fhir.resources.reference import Reference
 from pydantic import ValidationError
 
@@ -21,6 +24,8 @@ from fhir_kindling.generators.resource_generator import (
     ResourceGenerator,
 )
 from fhir_kindling.generators.time_series_generator import TimeSeriesGenerator
+from fhir_kindling.serde.flatten import flatten_resources
+from fhir_kindling.serde.json import json_dict
 
 
 @pytest.fixture
@@ -76,25 +81,43 @@ def vaccination_code():
 
 @pytest.fixture
 def covid_params(covid_code):
-    # generate patients with ids and turn into an iterator to call as a reference
+    # generate patients with ids and precompute one reference per generated resource
     patients = PatientGenerator(n=100, generate_ids=True).generate()
-    patient_ids = iter([patient.id for patient in patients])
+    references = [{"reference": f"Patient/{patient.id}"} for patient in patients]
     params = GeneratorParameters(
         count=100,
         field_values=[
             FieldValue(field="code", value=covid_code),
-        ],
-        field_generators=[
-            FieldGenerator(
-                field="subject",
-                generator_function=lambda: {
-                    "reference": f"Patient/{next(patient_ids)}"
-                },
-            )
+            FieldValue(field="subject", value=references),
         ],
     )
 
-    return params, patients, patient_ids
+    return params, patients, references
+
+
+@pytest.fixture
+def covid_dataset_generator(covid_code):
+    # factory for patient datasets with a covid condition for every patient
+    def make_generator(n: int = 10, seed: int = None) -> DatasetGenerator:
+        dataset_generator = DatasetGenerator("Patient", n=n, seed=seed)
+        covid_params = GeneratorParameters(
+            field_values=[FieldValue(field="code", value=covid_code)],
+            field_generators=[
+                FieldGenerator(
+                    field="recordedDate",
+                    choices=["2021-01-01T10:00:00+02:00", "2021-02-01T10:00:00Z"],
+                )
+            ],
+        )
+        dataset_generator.add_resource_generator(
+            ResourceGenerator("Condition", generator_parameters=covid_params),
+            name="covid",
+            depends_on="base",
+            reference_field="subject",
+        )
+        return dataset_generator
+
+    return make_generator
 
 
 def test_patient_generator():
@@ -126,6 +149,25 @@ def test_patient_generator():
     assert len(patients) == 10
 
 
+def test_seeded_generators(covid_dataset_generator):
+    patients = PatientGenerator(n=10, seed=42).generate()
+    patients_2 = PatientGenerator(n=10, seed=42).generate()
+    assert [p.json() for p in patients] == [p.json() for p in patients_2]
+
+    choices = ["2018-01-01", "2018-01-02", "2018-01-03"]
+    field_generator = FieldGenerator(field="birthdate", choices=choices, seed=42)
+    field_generator_2 = FieldGenerator(field="birthdate", choices=choices, seed=42)
+    values = [field_generator.generate() for _ in range(20)]
+    assert values == [field_generator_2.generate() for _ in range(20)]
+
+    dataset = covid_dataset_generator(n=5, seed=42).generate()
+    dataset_2 = covid_dataset_generator(n=5, seed=42).generate()
+    assert dataset.n_resources == 10
+    assert [r.json() for r in dataset.resources] == [
+        r.json() for r in dataset_2.resources
+    ]
+
+
 def test_generator_field_parameters():
     params = FieldGenerator(
         field="birthdate",
@@ -184,15 +226,47 @@ def test_field_generator():
     value = params.generate()
     assert value == "2018-01-01"
 
+    params = FieldGenerator(
+        field="birthdate", choices=choices, choice_probabilities=[0.2, 0.8]
+    )
+    values = params.generate_many(100)
+    assert len(values) == 100
+    assert set(values) <= set(choices)
+
+    params = FieldGenerator(field="birthdate", generator_function=lambda: "2018-01-01")
+    assert params.generate_many(3) == ["2018-01-01"] * 3
+
 
 def test_generator_with_parameters(covid_params):
-    params, patients, patient_ids = covid_params
+    params, patients, references = covid_params
 
     generator = ResourceGenerator("Condition", generator_parameters=params)
 
     resources = generator.generate()
 
     assert len(resources) == 100
+    assert resources[0].subject.reference == references[0]["reference"]
+
+
+def test_resource_generator_disable_validation(covid_code):
+    patients, references = PatientGenerator(n=10, generate_ids=True).generate(
+        references=True
+    )
+    params = GeneratorParameters(
+        count=10,
+        field_values=[
+            FieldValue(field="code", value=covid_code),
+            FieldValue(field="subject", value=[ref.dict() for ref in references]),
+        ],
+    )
+
+    generator = ResourceGenerator("Condition", generator_parameters=params)
+    resources = generator.generate(disable_validation=True)
+
+    assert len(resources) == 10
+    assert isinstance(resources[0], Condition)
+    assert resources[0].subject.reference == references[0].reference
+    assert resources[0].code == covid_code
 
 
 def test_resource_generator(covid_code):
@@ -294,9 +368,10 @@ def test_generate_covid_dataset(vaccination_code, covid_code, server):
         references=True
     )
 
+    today = date.today().isoformat()
     vaccination_date_generator = FieldGenerator(
         field="occurrenceDateTime",
-        generator_function=lambda: pendulum.now().to_date_string(),
+        generator_function=lambda: today,
     )
 
     first_vax_params = GeneratorParameters(
@@ -325,6 +400,88 @@ def test_generate_covid_dataset(vaccination_code, covid_code, server):
     dataset.upload(server)
 
 
+def test_dataset_transaction_bundle(covid_dataset_generator):
+    dataset = covid_dataset_generator(n=10).generate()
+    assert dataset.n_resources == 20
+
+    resource_dicts = [json_dict(resource) for resource in dataset.resources]
+    # patients and their conditions are kept in the same batch
+    batches = dataset._make_batches(resource_dicts, batch_size=5)
+    assert [len(batch) for batch in batches] == [4] * 5
+    assert sorted(i for batch in batches for i in batch) == list(range(20))
+
+    for batch in batches:
+        bundle = dataset._make_transaction_bundle(batch, resource_dicts)
+        assert bundle.type == "transaction"
+        assert len(bundle.entry) == 4
+
+        full_urls = {entry.fullUrl for entry in bundle.entry}
+        for entry in bundle.entry:
+            assert entry.request.method == "POST"
+            assert entry.resource.id is None
+            if entry.resource.resource_type == "Condition":
+                assert entry.resource.subject.reference in full_urls
+    # the resources of the dataset keep their ids and references
+    assert all(resource.id for resource in dataset.resources)
+
+
+def test_dataset_generate_parallel(covid_dataset_generator):
+    dataset_generator = covid_dataset_generator(n=20, seed=42)
+    dataset = dataset_generator.generate(n_jobs=2)
+    assert dataset.n_resources == 40
+
+    patients = [r for r in dataset.resources if r.resource_type == "Patient"]
+    patient_ids = {patient.id for patient in patients}
+    # the shards draw independent patients
+    assert len(patient_ids) == 20
+    assert len({patient.json(exclude={"id"}) for patient in patients}) > 1
+    for resource in dataset.resources:
+        if resource.resource_type == "Condition":
+            assert resource.subject.reference.split("/")[1] in patient_ids
+
+    # the dataset does not depend on the number of processes
+    sequential_dataset = covid_dataset_generator(n=20, seed=42).generate()
+    assert [r.json() for r in dataset.resources] == [
+        r.json() for r in sequential_dataset.resources
+    ]
+
+    # following calls continue the random stream of the generator
+    dataset_2 = dataset_generator.generate(n_jobs=2)
+    patients_2 = [r for r in dataset_2.resources if r.resource_type == "Patient"]
+    assert not patient_ids & {patient.id for patient in patients_2}
+
+
+def test_dataset_generate_columnar(covid_dataset_generator):
+    columns = covid_dataset_generator(n=10, seed=42).generate_columnar()
+
+    assert set(columns.keys()) == {"Patient", "Condition"}
+    patient_ids = columns["Patient"]["id"]
+    assert len(patient_ids) == 10
+    assert all(len(column) == 10 for column in columns["Condition"].values())
+
+    references = {f"Patient/{patient_id}" for patient_id in patient_ids}
+    assert set(columns["Condition"]["subject_reference"]) == references
+    assert set(columns["Condition"]["code_coding_0_code"]) == {"RA01.0"}
+    assert columns["Patient"]["birthDate"].dtype == np.dtype("datetime64[D]")
+    assert columns["Condition"]["recordedDate"].dtype == np.dtype("datetime64[us]")
+
+    # the columns have the layout of the flattened resources
+    dataset = covid_dataset_generator(n=10, seed=42).generate()
+    for resource_type, resource_columns in columns.items():
+        resources = [r for r in dataset.resources if r.resource_type == resource_type]
+        df = pd.DataFrame(resource_columns)
+        flat_df = flatten_resources(resources)
+        assert list(df.columns) == list(flat_df.columns)
+        assert list(df["id"]) == list(flat_df["id"])
+    recorded_dates = flatten_resources(
+        [r for r in dataset.resources if r.resource_type == "Condition"]
+    )["recordedDate"]
+    # datetime values are converted to utc
+    assert list(pd.DataFrame(columns["Condition"])["recordedDate"]) == list(
+        pd.to_datetime(recorded_dates, utc=True).dt.tz_localize(None)
+    )
+
+
 def test_time_series_generator():
     body_temp_code = CodeableConcept(
         coding=[
@@ -369,6 +526,14 @@ def test_time_series_generator():
     print("Result generate n \n\n")
     print(result)
     assert len(result) == 20
+    # resources after the first are copied from a template and only validated for changed fields
+    assert len({r.id for r in result}) == 20
+    assert isinstance(result[1].valueQuantity, Quantity)
+    assert result[1].code == result[0].code
+    # the resources of the series don't share nested elements
+    result[1].code.coding[0].code = "changed"
+    assert result[0].code.coding[0].code == "99836-5"
+    assert result[2].code.coding[0].code == "99836-5"
 
     body_temp_range_generator = TimeSeriesGenerator(
         resource_generator=body_temp_generator,
@@ -381,3 +546,54 @@ def test_time_series_generator():
 
     print("Result generate range \n\n")
     print(result)
+    assert len(result) == 59
+
+    # generating again starts the series from the start time
+    second_result = body_temp_range_generator.generate()
+    assert [r.effectiveDateTime for r in second_result] == [
+        r.effectiveDateTime for r in result
+    ]
+
+
+def test_time_series_generator_validation():
+    # required primitives are checked for every resource of the series
+    statuses = iter(["final", None])
+    observation_params = GeneratorParameters(
+        field_values=[FieldValue(field="code", value={"text": "Body temperature"})],
+        field_generators=[
+            FieldGenerator(field="status", generator_function=lambda: next(statuses))
+        ],
+    )
+    observation_ts_generator = TimeSeriesGenerator(
+        resource_generator=ResourceGenerator(
+            "Observation", generator_parameters=observation_params
+        ),
+        time_field="effectiveDateTime",
+        start=datetime(2021, 1, 1),
+        n=2,
+    )
+    with pytest.raises(ValidationError):
+        observation_ts_generator.generate()
+
+    # fields can be generated by their python name
+    task_params = GeneratorParameters(
+        field_values=[
+            FieldValue(field="status", value="requested"),
+            FieldValue(field="intent", value="order"),
+        ],
+        field_generators=[
+            FieldGenerator(
+                field="for_fhir",
+                generator_function=lambda: {"reference": "Patient/1"},
+            )
+        ],
+    )
+    task_ts_generator = TimeSeriesGenerator(
+        resource_generator=ResourceGenerator("Task", generator_parameters=task_params),
+        time_field="authoredOn",
+        start=datetime(2021, 1, 1),
+        n=3,
+    )
+    tasks = task_ts_generator.generate()
+    assert len(tasks) == 3
+    assert all(task.for_fhir.reference == "Patient/1" for task in tasks)
@@ -5,6 +5,7 @@ import pytest
 from dotenv import find_dotenv, load_dotenv
 
 from fhir_kindling import FhirServer
+from fhir_kindling.generators import PatientGenerator
 from fhir_kindling.serde.flatten import (
     flatten_resource,
     flatten_resources,
@@ -64,6 +65,15 @@ def test_flatten_resource(server):
     # flat_obs = flatten_resource(observation)
 
 
+def test_flatten_generated_resources():
+    patients = PatientGenerator(n=10, generate_ids=True).generate()
+    patients_df = flatten_resources(patients)
+
+    assert len(patients_df) == 10
+    assert "name_0_family" in patients_df.columns
+    assert patients_df["id"].tolist() == [patient.id for patient in patients]
+
+
 def test_resources_to_csv(server):
     patients = server.query("Patient").all().resources
     patients_df = flatten_resources(patients)
@@ -20,6 +20,7 @@ from fhir_kindling.util.references import (
 )
 from fhir_kindling.util.resources import (
     check_resource_contains_field,
+    construct_resource,
     get_resource_fields,
 )
 
@@ -142,6 +143,22 @@ def test_resource_contains_field(server):
         check_resource_contains_field("Patient", "foo")
 
 
+def test_construct_resource():
+    condition_dict = {
+        "resourceType": "Condition",
+        "subject": {"reference": "Patient/123"},
+        "code": {"coding": [{"system": "http://loinc.org", "code": "123"}]},
+    }
+    condition = construct_resource(Condition, condition_dict)
+
+    assert isinstance(condition, Condition)
+    assert condition.subject.reference == "Patient/123"
+    assert condition.code.coding[0].code == "123"
+    assert condition.json(exclude_none=True) == Condition(**condition_dict).json(
+        exclude_none=True
+    )
+
+
 def test_benchmark(server):
     transfer_server = FhirServer(api_address=os.getenv("TRANSFER_SERVER_URL"))
     benchmark = ServerBenchmark(
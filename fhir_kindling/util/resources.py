@@ -1,4 +1,4 @@
-from typing import List, Tuple, Type, Union
+from typing import Any, List, Tuple, Type, Union
 
 from fhir.resources import FHIRAbstractModel, get_fhir_model_class
 from fhir.resources.fhirtypes import ResourceType
@@ -69,3 +69,46 @@ def check_resource_contains_field(
     field_names = [field.name for field in fields]
     if field_name not in field_names:
         raise ValueError(f"Resource {resource} does not contain field {field_name}")
+
+
+def construct_resource(
+    resource: Type[FHIRAbstractModel], data: dict
+) -> FHIRAbstractModel:
+    """
+    Construct a resource model from trusted data without running the pydantic validators.
+    Nested dictionaries for element fields are recursively constructed as their corresponding models.
+    Args:
+        resource: the resource or element model class to construct
+        data: dictionary containing the fields of the resource, keyed by field name or alias
+
+    Returns:
+        the constructed, unvalidated resource
+
+    """
+    values = {}
+    for name, field in resource.__fields__.items():
+        if field.alias in data:
+            value = data[field.alias]
+        elif name in data:
+            value = data[name]
+        else:
+            continue
+
+        element_type = getattr(field.type_, "__resource_type__", None)
+        if element_type:
+            if isinstance(value, list):
+                value = [_construct_element(element_type, item) for item in value]
+            else:
+                value = _construct_element(element_type, value)
+        values[name] = value
+
+    return resource.construct(**values)
+
+
+def _construct_element(element_type: str, value: Any) -> Any:
+    # model instances are passed through as they are
+    if not isinstance(value, dict):
+        return value
+    # contained resources define their own type
+    element_type = value.get("resourceType", element_type)
+    return construct_resource(get_fhir_model_class(element_type), value)